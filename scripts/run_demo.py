@@ -13,10 +13,11 @@ import sys
 import os
 from pathlib import Path
 
-# Add src to path so we can import the grocery module
-sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+# Add the repository root to path so the grocery package is imported as
+# src.grocery, the same name main.py and a compiled build use
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from grocery.simulator import GrocerySimulator
+from src.grocery.simulator import GrocerySimulator
 
 
 def main():
@@ -34,6 +35,7 @@ def main():
         print("    Profit/Loss: NA")
         return 1
     
+    simulator = GrocerySimulator()  # run_file resets state for each file
     for file_path in sys.argv[1:]:
         print(f"--- {file_path} ---")
         
@@ -43,7 +45,6 @@ def main():
             continue
             
         try:
-            simulator = GrocerySimulator()
             simulator.run_file(file_path)
         except Exception as e:
             print(f"Error processing {file_path}: {e}")
@@ -15,9 +15,9 @@ def main(argv: list[str]) -> int:
         print("Usage: python main.py <input_file1> [<input_file2> ...]")
         return 1
     
+    simulator = GrocerySimulator()  # run_file resets state for each file
     for path in argv[1:]:
         print(f"--- {path} ---")
-        simulator = GrocerySimulator()
         simulator.run_file(path)
         print()  # one trailing blank line
     
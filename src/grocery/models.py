@@ -2,38 +2,48 @@
 Core data models for the Grocery Stock Management System.
 
 This module contains the data structures for managing inventory, sales, returns,
-and discount tracking with proper FIFO/LIFO semantics.
+and discount tracking with proper FIFO/LIFO semantics. Money is held as integer
+ten-thousandths of a cent throughout.
 """
 
-from typing import Dict, List, Deque
-from collections import deque
-from dataclasses import dataclass
-
-
-@dataclass
-class Batch:
-    """Represents a batch of products with purchase cost."""
-    qty: int
-    cost: float
-
-
-@dataclass
-class SaleComponent:
-    """Represents a component of a sale with unit cost and discounted sell price."""
-    qty: int
-    unit_cost: float
-    unit_sell_after_discount: float
-
-
-@dataclass
-class SaleLot:
-    """Represents a lot of sales at a specific price after discount."""
-    sell_price_after_discount: float
-    total_qty: int
-    components: Deque[SaleComponent]
+from typing import Dict, List
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
+class BatchQueue:
+    """
+    FIFO queue of stock batches for one item, stored as parallel lists.
+    
+    Batch i was stocked as qtys[i] units costing costs[i] ten-thousandths of a
+    cent each; ends[i] is the running total of units stocked up to and including
+    it. consumed counts the units taken from the front, so a run of batches is
+    located by bisecting ends and only the head batch is partially used.
+    Batches before head are fully consumed and are dropped from the lists
+    periodically. Plain lists keep quantities as unbounded Python ints, as the
+    spec puts no limit on them.
+    """
+    qtys: List[int] = field(default_factory=list)
+    costs: List[int] = field(default_factory=list)
+    ends: List[int] = field(default_factory=list)
+    head: int = 0
+    consumed: int = 0
+
+
+@dataclass(slots=True)
+class SaleStack:
+    """
+    Returnable units sold for one item at one sell price, as a LIFO stack.
+    
+    Entry i holds qtys[i] units that earned margins[i] ten-thousandths of a cent
+    each. Each ORDER pushes its FIFO components in reverse, so popping from the
+    end reverses the newest sale first and, within it, its oldest component first.
+    """
+    qtys: List[int] = field(default_factory=list)
+    margins: List[int] = field(default_factory=list)
 
 
 # Type aliases
-Inventory = Dict[str, Deque[Batch]]
-DiscountStack = Dict[str, List[float]]
-SalesHistory = Dict[str, Dict[float, List[SaleLot]]]
+Inventory = Dict[str, BatchQueue]
+DiscountStack = Dict[str, List[int]]  # discounts in basis points, active one last
+SalesHistory = Dict[str, Dict[int, SaleStack]]  # per item, keyed by sell price in cents
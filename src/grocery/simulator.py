@@ -5,9 +5,98 @@ Strictly implements CSC201 Task 1 rules with FIFO inventory, LIFO returns,
 and per-item discount stacks.
 """
 
-from collections import defaultdict, deque
-from typing import Dict, List
-from .models import Batch, SaleComponent, SaleLot, Inventory, DiscountStack, SalesHistory
+import sys
+from bisect import bisect_left
+from operator import mul
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from .models import BatchQueue, SaleStack, Inventory, DiscountStack, SalesHistory
+
+
+def _parse_qty(text: str) -> int:
+    """Parse a quantity, tolerating "10.0" format without a float round-trip for plain ints."""
+    try:
+        return int(text)
+    except ValueError:
+        return int(float(text))
+
+
+def _to_cents(amount: float) -> int:
+    """Convert a parsed money amount to whole cents."""
+    return round(amount * 100)
+
+
+# Internal money unit: ten-thousandths of a cent. A price in cents times
+# (10000 - discount basis points) is then the exact discounted price, so
+# profit never picks up per-unit rounding
+_SUBCENTS = 10000
+
+
+def _format_money(amount: int) -> str:
+    """Format an amount in ten-thousandths of a cent as dollars with exactly 2 decimals.
+    
+    The exact amount is rounded to the cent with halves going away from zero,
+    e.g. 675000 -> "0.68" and -55000 -> "-0.06". A loss under half a cent keeps
+    its sign, as "%.2f" did: -4000 -> "-0.00".
+    """
+    cents, rest = divmod(abs(amount), _SUBCENTS)
+    if rest * 2 >= _SUBCENTS:
+        cents += 1
+    sign = '-' if amount < 0 else ''
+    whole, frac = divmod(cents, 100)
+    return f"{sign}{whole}.{frac:02d}"
+
+
+# PROFIT output for an invalid run, built once
+_NA_LINE = sys.intern("Profit/Loss: NA")
+
+# Consumed batches are compacted out of a BatchQueue once at least this many
+# have accumulated and they make up half of the lists
+_COMPACT_MIN = 32
+
+
+def _advance_head(batches: BatchQueue, head: int, consumed: int) -> None:
+    """Record consumption up to head, dropping consumed batches when worthwhile."""
+    ends = batches.ends
+    if head == len(ends):
+        # Drained: restart the running totals from zero
+        del batches.qtys[:]
+        del batches.costs[:]
+        del ends[:]
+        head = 0
+        consumed = 0
+    elif head >= _COMPACT_MIN and head * 2 >= len(ends):
+        # Running totals are absolute, so the kept entries need no rewriting
+        del batches.qtys[:head]
+        del batches.costs[:head]
+        del ends[:head]
+        head = 0
+    batches.head = head
+    batches.consumed = consumed
+
+
+def _take_cost(batches: BatchQueue, head: int, last: int, target: int) -> int:
+    """Cost of the units from batches.consumed up to target, spanning batches head..last."""
+    costs = batches.costs
+    consumed = batches.consumed
+    if head == last:
+        return (target - consumed) * costs[head]
+    ends = batches.ends
+    # Batches strictly between head and last are used up whole, so their cost
+    # folds over the stocked quantities without a per-batch Python loop
+    middle: int = sum(map(mul, batches.qtys[head + 1:last], costs[head + 1:last]))
+    return ((ends[head] - consumed) * costs[head] + middle
+            + (target - ends[last - 1]) * costs[last])
+
+
+def _push_sale(stack: SaleStack, qty: int, margin: int) -> None:
+    """Push sold units onto a sale stack, merging with the top entry if the margin matches."""
+    margins = stack.margins
+    if margins and margins[-1] == margin:
+        # Units with equal margins are interchangeable for RETURN
+        stack.qtys[-1] += qty
+    else:
+        stack.qtys.append(qty)
+        margins.append(margin)
 
 
 class GrocerySimulator:
@@ -15,29 +104,85 @@ class GrocerySimulator:
     Processes grocery store commands following CSC201 Task 1 specification.
     
     Key Rules:
-    - Inventory: FIFO per item using deque of Batch(qty, cost)
+    - Inventory: FIFO per item using a BatchQueue (qty/cost/running-total lists)
     - Discounts: per-item LIFO stack (last one active)
     - ORDER: Apply discount to sell price, consume FIFO, record by original sell price
     - RETURN: Match exact sell price, LIFO by sale lot, FIFO within lot
     - Error handling: Any invalid operation sets invalid=True
     """
     
-    def __init__(self):
-        self.inventory: Inventory = defaultdict(deque)
-        self.discounts: DiscountStack = defaultdict(list)
-        self.sales: SalesHistory = defaultdict(lambda: defaultdict(list))
-        self.profit: float = 0.0
+    def __init__(self, out: Optional[Callable[[str], object]] = None) -> None:
+        """
+        Create an empty simulator.
+        
+        out: optional line sink called once per output line, without its
+        trailing newline (e.g. list.append); defaults to printing to stdout.
+        """
+        self.inventory: Inventory = {}
+        self.discounts: DiscountStack = {}
+        self.sales: SalesHistory = {}
+        self.totals: Dict[str, int] = {}  # running sum of batch qtys per item
+        # Units still returnable per (item, sell price in cents)
+        self.sold_open: Dict[Tuple[str, int], int] = {}
+        # Every item CHECK lists (inventory, discount or sales entry), kept sorted
+        self._names: List[str] = []
+        # Formatted CHECK line per item, dropped whenever the item's total changes
+        self._check_lines: Dict[str, str] = {}
+        self.profit: int = 0  # in ten-thousandths of a cent
         self.invalid: bool = False
+        # Sale stacks are only needed to reverse sales; run_file clears this
+        # when the input contains no RETURN at all
+        self._track_sales: bool = True
+        self._sink = out
+        # Output lines are collected here while run_file is running, then written once
+        self._out: Optional[List[str]] = None
+    
+    def reset(self) -> None:
+        """Clear all run state in place so the simulator can be reused."""
+        self.inventory.clear()
+        self.discounts.clear()
+        self.sales.clear()
+        self.totals.clear()
+        self.sold_open.clear()
+        self._names.clear()
+        self._check_lines.clear()
+        self.profit = 0
+        self.invalid = False
+        self._track_sales = True
+    
+    def _add_name(self, item: str) -> None:
+        """Insert item into the sorted CHECK listing if it is not already there."""
+        names = self._names
+        index = bisect_left(names, item)
+        if index == len(names) or names[index] != item:
+            names.insert(index, item)
     
-    def _active_discount(self, item: str) -> float:
-        """Get active discount percentage for item (last one pushed)."""
-        if self.discounts[item]:
-            return self.discounts[item][-1]  # LIFO - last discount is active
-        return 0.0
+    def _write(self, line: str) -> None:
+        """Emit an output line, buffering it while a file is being run."""
+        out = self._out
+        if out is not None:
+            out.append(line)
+        elif self._sink is None:
+            print(line)
+        else:
+            self._sink(line)
     
-    def _total_available(self, item: str) -> int:
-        """Get total available inventory quantity for item."""
-        return sum(batch.qty for batch in self.inventory[item])
+    def _write_lines(self, lines: List[str]) -> None:
+        """Emit several output lines, writing them to stdout in one call by default."""
+        out = self._out
+        if out is not None:
+            out.extend(lines)
+        elif self._sink is None:
+            print("\n".join(lines))
+        else:
+            sink = self._sink
+            for line in lines:
+                sink(line)
+    
+    def _active_discount(self, item: str) -> int:
+        """Get active discount for item in basis points (last one pushed)."""
+        stack = self.discounts.get(item)
+        return stack[-1] if stack else 0  # LIFO - last discount is active
     
     def process_line(self, line: str) -> None:
         """
@@ -53,246 +198,306 @@ class GrocerySimulator:
         - CHECK: Only if not invalid, print all items alphabetically.
         - PROFIT: "Profit/Loss: NA" if invalid, else "Profit/Loss: $XX.XX".
         """
-        line = line.strip()
-        if not line or line.startswith('#'):
+        # Once invalid, CHECK prints nothing and other commands are ignored, so
+        # only a PROFIT line can still matter; skip everything else unparsed
+        if self.invalid and 'PROFIT' not in line:
+            return
+        
+        # No command takes more than 4 tokens; anything beyond lands in the last
+        # field, which then fails its numeric parse (or the arity unpack). The
+        # split also drops surrounding whitespace, so no separate strip is needed:
+        # a blank line gives no tokens and a comment starts its first token.
+        parts = line.split(None, 3)
+        if not parts:
+            return
+        command = parts[0]
+        if command[0] == '#':
+            return
+        if len(parts) > 1:
+            # Interned names make the repeated per-item dict lookups compare
+            # keys by identity
+            parts[1] = sys.intern(parts[1])
+        
+        # Only PROFIT still runs when invalid
+        if self.invalid and command != "PROFIT":
+            return
+        
+        handler = _DISPATCH.get(command)
+        if handler is None:
+            # Unknown command => invalid
+            self.invalid = True
             return
             
         try:
-            parts = line.split()
-            if not parts:
-                return
-                
-            command = parts[0]
+            handler(self, parts)
+        except (ValueError, IndexError, TypeError, OverflowError):
+            # Parsing errors (wrong argument count, non-numbers) => invalid. inf
+            # and nan cannot be converted to integer money, so they are invalid too
+            self.invalid = True
+    
+    def process_lines(self, lines: Iterable[str]) -> None:
+        """Process several command lines in order (same rules as process_line)."""
+        process_line = self.process_line
+        for line in lines:
+            process_line(line)
+    
+    def _do_stock(self, parts: List[str]) -> None:
+        """STOCK item qty cost - add a batch to the item's FIFO inventory."""
+        _, item, qty_str, cost_str = parts
+        qty = _parse_qty(qty_str)
+        cost_cents = _to_cents(float(cost_str))
+        
+        # qty>=0 AND cost>0 (after rounding to the cent), else invalid
+        if qty < 0 or cost_cents <= 0:
+            self.invalid = True
+            return
             
-            # Allow CHECK and PROFIT even when invalid, block others
-            if self.invalid and command not in ("CHECK", "PROFIT"):
-                return
+        # Append batch if qty>0
+        if qty > 0:
+            batches = self.inventory.get(item)
+            if batches is None:
+                batches = self.inventory[item] = BatchQueue()
+                self._add_name(item)
+            ends = batches.ends
+            batches.qtys.append(qty)
+            batches.costs.append(cost_cents * _SUBCENTS)
+            ends.append(ends[-1] + qty if ends else qty)
+            self.totals[item] = self.totals.get(item, 0) + qty
+            self._check_lines.pop(item, None)
+    
+    def _do_order(self, parts: List[str]) -> None:
+        """ORDER item qty sell - sell FIFO stock at the discounted price."""
+        _, item, qty_str, sell_str = parts
+        qty = _parse_qty(qty_str)
+        sell = float(sell_str)
+        
+        # qty>=0, sell>=0, else invalid
+        if qty < 0 or sell < 0:
+            self.invalid = True
+            return
+        # Converted before any state changes: inf/nan raise here
+        sell_cents = _to_cents(sell)
             
-            if command == "STOCK":
-                if len(parts) != 4:
-                    self.invalid = True
-                    return
-                item, qty_str, cost_str = parts[1], parts[2], parts[3]
-                qty = int(float(qty_str))  # Tolerate "10.0" format
-                cost = float(cost_str)
-                
-                # qty>=0 AND cost>0, else invalid
-                if qty < 0 or cost <= 0:
-                    self.invalid = True
-                    return
-                    
-                # Append batch if qty>0
-                if qty > 0:
-                    self.inventory[item].append(Batch(qty, cost))
-                    
-            elif command == "ORDER":
-                if len(parts) != 4:
-                    self.invalid = True
-                    return
-                item, qty_str, sell_str = parts[1], parts[2], parts[3]
-                qty = int(float(qty_str))  # Tolerate "10.0" format
-                sell = float(sell_str)
-                
-                # qty>=0, sell>=0, else invalid
-                if qty < 0 or sell < 0:
-                    self.invalid = True
-                    return
-                    
-                # Zero-qty ORDER is allowed and does nothing
-                if qty == 0:
-                    return
-                    
-                # Insufficient stock => invalid
-                if self._total_available(item) < qty:
-                    self.invalid = True
-                    return
-                    
-                # Apply only the active discount to sell price
-                discount_pct = self._active_discount(item)
-                sell_after_discount = sell * (1 - discount_pct / 100)
-                
-                # Consume FIFO batches, record components
-                components = deque()
-                remaining_qty = qty
-                
-                while remaining_qty > 0 and self.inventory[item]:
-                    batch = self.inventory[item][0]
-                    take_qty = min(remaining_qty, batch.qty)
-                    
-                    # For each component: profit += take*(sell_after_discount - batch.cost)
-                    self.profit += take_qty * (sell_after_discount - batch.cost)
-                    
-                    # Record component with unit_cost and unit_sell_after_discount
-                    components.append(SaleComponent(take_qty, batch.cost, sell_after_discount))
-                    
-                    # Update batch
-                    batch.qty -= take_qty
-                    if batch.qty == 0:
-                        self.inventory[item].popleft()
-                        
-                    remaining_qty -= take_qty
-                
-                # Record SaleLot under ORIGINAL sell price key (for returns matching)
-                sale_lot = SaleLot(sell_after_discount, qty, components)
-                self.sales[item][sell].append(sale_lot)
-                    
-            elif command == "EXPIRE":
-                if len(parts) != 3:
-                    self.invalid = True
-                    return
-                item, qty_str = parts[1], parts[2]
-                qty = int(float(qty_str))  # Tolerate "10.0" format
-                
-                # qty>=0, else invalid
-                if qty < 0:
-                    self.invalid = True
-                    return
-                    
-                # Zero-qty is no-op
-                if qty == 0:
-                    return
-                    
-                # Insufficient stock => invalid
-                if self._total_available(item) < qty:
-                    self.invalid = True
-                    return
-                    
-                # Consume FIFO batches; profit -= take*batch.cost
-                remaining_qty = qty
-                while remaining_qty > 0 and self.inventory[item]:
-                    batch = self.inventory[item][0]
-                    take_qty = min(remaining_qty, batch.qty)
-                    
-                    self.profit -= take_qty * batch.cost
-                    
-                    batch.qty -= take_qty
-                    if batch.qty == 0:
-                        self.inventory[item].popleft()
-                        
-                    remaining_qty -= take_qty
-                        
-            elif command == "RETURN":
-                if len(parts) != 4:
-                    self.invalid = True
-                    return
-                item, qty_str, sell_str = parts[1], parts[2], parts[3]
-                qty = int(float(qty_str))  # Tolerate "10.0" format
-                sell = float(sell_str)
-                
-                # qty>=0, else invalid
-                if qty < 0:
-                    self.invalid = True
-                    return
-                    
-                # Zero-qty is no-op
-                if qty == 0:
-                    return
-                    
-                # Must not exceed total units previously sold at EXACT sell price
-                if item not in self.sales or sell not in self.sales[item]:
-                    self.invalid = True
-                    return
-                    
-                # Calculate available to return (positive total_qty means available)
-                total_available_to_return = sum(
-                    max(0, lot.total_qty) for lot in self.sales[item][sell]
-                )
-                
-                if total_available_to_return < qty:
-                    self.invalid = True
-                    return
-                    
-                # Reverse sales LIFO by sale-lot, FIFO within lot's components
-                remaining_qty = qty
-                
-                # Process lots in reverse order (LIFO by sale-lot)
-                for lot in reversed(self.sales[item][sell]):
-                    if remaining_qty <= 0:
-                        break
-                        
-                    if lot.total_qty <= 0:  # Already fully returned
-                        continue
-                        
-                    # Within this lot, process components FIFO
-                    lot_qty_to_return = min(remaining_qty, lot.total_qty)
-                    lot_remaining = lot_qty_to_return
-                    
-                    while lot_remaining > 0 and lot.components:
-                        component = lot.components[0]
-                        if component.qty <= 0:
-                            lot.components.popleft()
-                            continue
-                            
-                        take_qty = min(lot_remaining, component.qty)
-                        
-                        # For each returned unit: profit -= (unit_sell_after_discount - unit_cost)
-                        self.profit -= take_qty * (component.unit_sell_after_discount - component.unit_cost)
-                        
-                        # Update component
-                        component.qty -= take_qty
-                        if component.qty == 0:
-                            lot.components.popleft()
-                            
-                        lot_remaining -= take_qty
-                        
-                    # Update lot total_qty
-                    lot.total_qty -= lot_qty_to_return
-                    remaining_qty -= lot_qty_to_return
-                        
-            elif command == "DISCOUNT":
-                if len(parts) != 3:
-                    self.invalid = True
-                    return
-                item, pct_str = parts[1], parts[2]
-                pct = float(pct_str)
-                # Push onto per-item LIFO stack
-                self.discounts[item].append(pct)
-                
-            elif command == "DISCOUNT_END":
-                if len(parts) != 2:
-                    self.invalid = True
-                    return
-                item = parts[1]
-                # Pop from stack; popping empty is no-op
-                if self.discounts[item]:
-                    self.discounts[item].pop()
-                    
-            elif command == "CHECK":
-                if len(parts) != 1:
-                    self.invalid = True
-                    return
-                    
-                # Only if run is NOT invalid, print items
-                if self.invalid:
-                    return
-                    
-                # Print all items (sorted by item name) from union of keys
-                all_items = set()
-                all_items.update(self.inventory.keys())
-                all_items.update(self.discounts.keys())
-                all_items.update(self.sales.keys())
-                
-                for item in sorted(all_items):
-                    qty = self._total_available(item)
-                    print(f"{item}: {qty}")
-                    
-            elif command == "PROFIT":
-                if len(parts) != 1:
-                    self.invalid = True
-                    return
-                    
-                if self.invalid:
-                    print("Profit/Loss: NA")
-                else:
-                    print(f"Profit/Loss: ${self.profit:.2f}")
-                    
+        # Zero-qty ORDER is allowed and does nothing
+        if qty == 0:
+            return
+            
+        # Insufficient stock => invalid
+        available = self.totals.get(item, 0)
+        if available < qty:
+            self.invalid = True
+            return
+        self.totals[item] = available - qty
+        self._check_lines.pop(item, None)
+            
+        # Apply only the active discount to sell price, exactly in ten-thousandths
+        # of a cent (10000 basis points make the whole price)
+        sell_after_discount = sell_cents * (10000 - self._active_discount(item))
+        
+        # Consume FIFO batches, recording (qty, margin) components for RETURN
+        components: List[Tuple[int, int]]
+        batches = self.inventory[item]
+        ends = batches.ends
+        costs = batches.costs
+        head = batches.head
+        consumed = batches.consumed
+        target = consumed + qty
+        head_end = ends[head]
+        
+        if target <= head_end:
+            # Common case: the oldest batch covers the whole order
+            margin = sell_after_discount - costs[head]
+            self.profit += qty * margin
+            if target == head_end:
+                _advance_head(batches, head + 1, target)
             else:
-                # Unknown command => invalid
-                self.invalid = True
-                
-        except (ValueError, IndexError, TypeError):
-            # Parsing errors => invalid
+                batches.consumed = target
+            if not self._track_sales:
+                return
+            components = [(qty, margin)]
+        else:
+            # Binary search for the batch that completes the order; totals
+            # guarantees it exists
+            last = bisect_left(ends, target, head + 1)
+            next_head = last + 1 if ends[last] == target else last
+            if not self._track_sales:
+                # Fold the cost of everything consumed in one go
+                cost = _take_cost(batches, head, last, target)
+                self.profit += qty * sell_after_discount - cost
+                _advance_head(batches, next_head, target)
+                return
+            
+            # Walk just the touched batches for their components, reading them
+            # before _advance_head may compact them away
+            qtys = batches.qtys
+            margin = sell_after_discount - costs[head]
+            components = [(head_end - consumed, margin)]
+            profit = self.profit + (head_end - consumed) * margin
+            for i in range(head + 1, last):
+                margin = sell_after_discount - costs[i]
+                take_qty = qtys[i]
+                profit += take_qty * margin
+                components.append((take_qty, margin))
+            take_qty = target - ends[last - 1]
+            margin = sell_after_discount - costs[last]
+            profit += take_qty * margin
+            components.append((take_qty, margin))
+            self.profit = profit
+            _advance_head(batches, next_head, target)
+        
+        # Record the sale under ORIGINAL sell price (for returns matching). Pushing
+        # components in reverse leaves this sale's oldest component on top.
+        per_item = self.sales.get(item)
+        if per_item is None:
+            per_item = self.sales[item] = {}
+            self._add_name(item)
+        stack = per_item.get(sell_cents)
+        if stack is None:
+            stack = per_item[sell_cents] = SaleStack()
+        for take_qty, margin in reversed(components):
+            _push_sale(stack, take_qty, margin)
+        key = (item, sell_cents)
+        self.sold_open[key] = self.sold_open.get(key, 0) + qty
+    
+    def _do_expire(self, parts: List[str]) -> None:
+        """EXPIRE item qty - write off FIFO stock at cost."""
+        _, item, qty_str = parts
+        qty = _parse_qty(qty_str)
+        
+        # qty>=0, else invalid
+        if qty < 0:
+            self.invalid = True
+            return
+            
+        # Zero-qty is no-op
+        if qty == 0:
+            return
+            
+        # Insufficient stock => invalid
+        available = self.totals.get(item, 0)
+        if available < qty:
             self.invalid = True
+            return
+        self.totals[item] = available - qty
+        self._check_lines.pop(item, None)
+            
+        # Consume FIFO batches; profit -= take*batch.cost
+        batches = self.inventory[item]
+        ends = batches.ends
+        head = batches.head
+        target = batches.consumed + qty
+        head_end = ends[head]
+        if target < head_end:
+            # Common case: only the oldest batch is touched
+            self.profit -= qty * batches.costs[head]
+            batches.consumed = target
+            return
+        last = bisect_left(ends, target, head)
+        self.profit -= _take_cost(batches, head, last, target)
+        _advance_head(batches, last + 1 if ends[last] == target else last, target)
+    
+    def _do_return(self, parts: List[str]) -> None:
+        """RETURN item qty sell - reverse sales made at exactly this sell price."""
+        _, item, qty_str, sell_str = parts
+        qty = _parse_qty(qty_str)
+        sell = float(sell_str)
+        
+        # qty>=0, else invalid
+        if qty < 0:
+            self.invalid = True
+            return
+            
+        # Zero-qty is no-op
+        if qty == 0:
+            return
+            
+        # Must not exceed total units previously sold at EXACT sell price (to the cent)
+        sell_cents = _to_cents(sell)
+        key = (item, sell_cents)
+        if self.sold_open.get(key, 0) < qty:
+            self.invalid = True
+            return
+        self.sold_open[key] -= qty
+        stack = self.sales[item][sell_cents]
+            
+        # Reverse sales LIFO by sale, FIFO within a sale's components: both
+        # orders are already encoded in the stack, so just pop from the top
+        qtys = stack.qtys
+        margins = stack.margins
+        remaining_qty = qty
+        profit = self.profit
+        while remaining_qty > 0:
+            top_qty = qtys[-1]
+            if top_qty <= remaining_qty:
+                # For each returned unit: profit -= margin
+                profit -= top_qty * margins[-1]
+                qtys.pop()
+                margins.pop()
+                remaining_qty -= top_qty
+            else:
+                profit -= remaining_qty * margins[-1]
+                qtys[-1] = top_qty - remaining_qty
+                remaining_qty = 0
+        self.profit = profit
+    
+    def _do_discount(self, parts: List[str]) -> None:
+        """DISCOUNT item pct - push a discount onto the item's stack."""
+        _, item, pct_str = parts
+        # Stored in basis points (hundredths of a percent) for integer price math;
+        # finer percentages are rounded to the nearest basis point
+        discount_bp = round(float(pct_str) * 100)
+        # Push onto per-item LIFO stack
+        self._discount_stack(item).append(discount_bp)
+    
+    def _do_discount_end(self, parts: List[str]) -> None:
+        """DISCOUNT_END item - pop the item's active discount."""
+        _, item = parts
+        # Pop from stack; popping empty is no-op. The (possibly empty) stack is
+        # kept so the item stays listed by CHECK.
+        stack = self._discount_stack(item)
+        if stack:
+            stack.pop()
+    
+    def _discount_stack(self, item: str) -> List[int]:
+        """Get item's discount stack, creating (and listing) it on first use."""
+        stack = self.discounts.get(item)
+        if stack is None:
+            stack = self.discounts[item] = []
+            self._add_name(item)
+        return stack
+    
+    def _do_check(self, parts: List[str]) -> None:
+        """CHECK - print current quantities for all tracked items."""
+        (_,) = parts
+            
+        # Only if run is NOT invalid, print items
+        if self.invalid:
+            return
+            
+        # Print all items (sorted by item name); the list is maintained sorted
+        all_items = self._names
+        if not all_items:
+            return
+        
+        # Reuse cached lines for unchanged items; emit the listing in one go
+        totals = self.totals
+        cache = self._check_lines
+        lines = []
+        for item in all_items:
+            line = cache.get(item)
+            if line is None:
+                line = cache[item] = f"{item}: {totals.get(item, 0)}"
+            lines.append(line)
+        self._write_lines(lines)
+    
+    def _do_profit(self, parts: List[str]) -> None:
+        """PROFIT - print running profit/loss, or NA if invalid."""
+        (_,) = parts
+            
+        if self.invalid:
+            self._write(_NA_LINE)
+        else:
+            self._write(f"Profit/Loss: ${_format_money(self.profit)}")
     
     def run_file(self, path: str) -> None:
         """
@@ -300,12 +505,51 @@ class GrocerySimulator:
         
         Any file I/O errors will set invalid flag.
         """
-        # Reset state
-        self.__init__()
+        self.reset()
         
         try:
-            with open(path, 'r') as f:
-                for line in f:
-                    self.process_line(line)
+            # One bulk read and decode instead of per-line readline calls
+            with open(path, 'rb') as f:
+                data = f.read()
         except (IOError, OSError):
             self.invalid = True
+            return
+        self._track_sales = b'RETURN' in data
+            
+        # Buffer CHECK/PROFIT output and flush it in one go at the end
+        self._out = []
+        lines = data.decode('utf-8', 'replace').splitlines()
+        try:
+            # After an invalid line, process_line skips non-PROFIT lines unparsed
+            self.process_lines(lines)
+        finally:
+            self._flush()
+            # The RETURN scan only describes this file; later lines may return sales
+            self._track_sales = True
+    
+    def _flush(self) -> None:
+        """Stop buffering and pass the collected output on."""
+        out = self._out
+        self._out = None
+        if not out:
+            return
+        if self._sink is None:
+            # Same bytes as printing each line, in a single stdout write
+            sys.stdout.write("\n".join(out) + "\n")
+        else:
+            for line in out:
+                self._sink(line)
+
+
+# Command word -> handler, built once for all simulators; each handler receives
+# the simulator and the pre-split line
+_DISPATCH: Dict[str, Callable[[GrocerySimulator, List[str]], None]] = {
+    sys.intern("STOCK"): GrocerySimulator._do_stock,
+    sys.intern("ORDER"): GrocerySimulator._do_order,
+    sys.intern("EXPIRE"): GrocerySimulator._do_expire,
+    sys.intern("RETURN"): GrocerySimulator._do_return,
+    sys.intern("DISCOUNT"): GrocerySimulator._do_discount,
+    sys.intern("DISCOUNT_END"): GrocerySimulator._do_discount_end,
+    sys.intern("CHECK"): GrocerySimulator._do_check,
+    sys.intern("PROFIT"): GrocerySimulator._do_profit,
+}
@@ -4,70 +4,99 @@ End-to-end tests for the Grocery Stock Management System.
 Tests verify the complete workflow using only standard library with inline test data.
 """
 
-import unittest
-from io import StringIO
+import contextlib
+import io
+import os
 import sys
+import tempfile
+import unittest
+from typing import Iterable, List, Optional, Tuple, Union
 from src.grocery.simulator import GrocerySimulator
 
+# Expected output of PROFIT for an invalid run
+NA = sys.intern("Profit/Loss: NA")
+
 
-def run_sim(lines: list[str]) -> str:
-    """Helper function to run simulator and capture stdout."""
-    old_stdout = sys.stdout
-    sys.stdout = captured_output = StringIO()
-    
-    try:
-        simulator = GrocerySimulator()
-        for line in lines:
-            simulator.process_line(line)
-        return captured_output.getvalue().rstrip()
-    finally:
-        sys.stdout = old_stdout
+def run_sim(lines: Union[str, Iterable[str]],
+            shared: Optional[Tuple[GrocerySimulator, List[str]]] = None) -> str:
+    """Helper function to run simulator and capture its output.
+
+    lines may be an iterable of command lines or one multi-line string.
+    shared is an optional (simulator, output list) pair to run on instead of a
+    fresh simulator; the list must be the simulator's out sink, and the caller
+    resets both beforehand.
+    """
+    if isinstance(lines, str):
+        lines = lines.splitlines()
+    if shared is None:
+        buf: List[str] = []
+        simulator = GrocerySimulator(out=buf.append)
+    else:
+        simulator, buf = shared
+    simulator.process_lines(lines)
+    return "\n".join(buf)
 
 
 class TestEndToEnd(unittest.TestCase):
     """Comprehensive end-to-end test cases for HD-level coverage (90%+)."""
     
+    # Shared fixtures, built once for the whole class
+    PROFIT_PREFIX = "Profit/Loss: $"
+    OFFICIAL_LINES = (
+        "STOCK Apple 100 1.00",
+        "ORDER Apple 50 2.00",
+        "STOCK Peer 20 1.50",
+        "DISCOUNT Apple 10",
+        "ORDER Apple 20 2.00",
+        "DISCOUNT Apple 5",
+        "ORDER Apple 10 2.00",
+        "DISCOUNT_END Apple",
+        "ORDER Apple 10 2.00",
+        "RETURN Apple 5 2.00",
+        "EXPIRE Apple 5",
+        "CHECK",
+        "PROFIT",
+    )
+    
+    @classmethod
+    def setUpClass(cls):
+        # One simulator for the whole class instead of one per test
+        cls._shared_buf = []
+        cls._shared_sim = GrocerySimulator(out=cls._shared_buf.append)
+    
+    def setUp(self):
+        # Reset the shared pair here only; run_sim does not reset it again
+        self._shared_sim.reset()
+        self._shared_buf.clear()
+        self.shared = (self._shared_sim, self._shared_buf)
+    
     def test_01_official_example(self):
         """Test the official example from CSC201 Task 1 specification."""
-        lines = [
-            "STOCK Apple 100 1.00",
-            "ORDER Apple 50 2.00",
-            "STOCK Peer 20 1.50", 
-            "DISCOUNT Apple 10",
-            "ORDER Apple 20 2.00",
-            "DISCOUNT Apple 5",
-            "ORDER Apple 10 2.00",
-            "DISCOUNT_END Apple",
-            "ORDER Apple 10 2.00",
-            "RETURN Apple 5 2.00",
-            "EXPIRE Apple 5",
-            "CHECK",
-            "PROFIT"
-        ]
+        lines = self.OFFICIAL_LINES
         
         expected_output = """Apple: 5
 Peer: 20
 Profit/Loss: $74.00"""
         
-        result = run_sim(lines)
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_02_oversell_invalid(self):
         """Test oversell causes invalid - output is ONLY 'Profit/Loss: NA'."""
-        lines = [
+        lines = (
             "STOCK Apple 5 2.00",
             "ORDER Apple 10 4.00",  # Oversell
             "CHECK",
             "PROFIT"
-        ]
+        )
         
-        expected_output = "Profit/Loss: NA"
-        result = run_sim(lines)
+        expected_output = NA
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_03_complex_returns_lifo_fifo(self):
         """Test returns with LIFO lot selection and FIFO within-lot processing."""
-        lines = [
+        lines = (
             "STOCK Apple 5 1.00",   # Batch 1: 5 @ $1.00
             "STOCK Apple 3 2.00",   # Batch 2: 3 @ $2.00
             "ORDER Apple 4 5.00",   # Sale 1: 4 @ $1.00 -> $16 profit
@@ -75,159 +104,159 @@ Profit/Loss: $74.00"""
             "RETURN Apple 3 5.00",  # Return from Sale 2 first (LIFO)
             "CHECK",
             "PROFIT"
-        ]
+        )
         
         expected_output = """Apple: 2
 Profit/Loss: $12.00"""
         
-        result = run_sim(lines)
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_04_negative_stock_cost_invalid(self):
         """Test STOCK with cost <= 0 is invalid."""
-        lines = [
+        lines = (
             "STOCK Apple 10 0.00",  # Invalid: cost = 0
             "CHECK",
             "PROFIT"
-        ]
+        )
         
-        expected_output = "Profit/Loss: NA"
-        result = run_sim(lines)
+        expected_output = NA
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_05_negative_stock_quantity_invalid(self):
         """Test STOCK with qty < 0 is invalid."""
-        lines = [
+        lines = (
             "STOCK Apple -5 2.00",  # Invalid: negative quantity
             "CHECK", 
             "PROFIT"
-        ]
+        )
         
-        expected_output = "Profit/Loss: NA"
-        result = run_sim(lines)
+        expected_output = NA
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_06_negative_order_sell_invalid(self):
         """Test ORDER with negative sell price is invalid."""
-        lines = [
+        lines = (
             "STOCK Apple 5 2.00",
             "ORDER Apple 3 -1.00",  # Invalid: negative sell price
             "CHECK",
             "PROFIT"
-        ]
+        )
         
-        expected_output = "Profit/Loss: NA"
-        result = run_sim(lines)
+        expected_output = NA
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_07_negative_order_quantity_invalid(self):
         """Test ORDER with negative quantity is invalid."""
-        lines = [
+        lines = (
             "STOCK Apple 5 2.00",
             "ORDER Apple -3 4.00",  # Invalid: negative quantity
             "CHECK",
             "PROFIT"
-        ]
+        )
         
-        expected_output = "Profit/Loss: NA"
-        result = run_sim(lines)
+        expected_output = NA
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_08_over_expire_invalid(self):
         """Test EXPIRE more than available is invalid."""
-        lines = [
+        lines = (
             "STOCK Apple 5 2.00",
             "EXPIRE Apple 10",  # Invalid: only 5 available
             "CHECK",
             "PROFIT"
-        ]
+        )
         
-        expected_output = "Profit/Loss: NA"
-        result = run_sim(lines)
+        expected_output = NA
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_09_negative_expire_quantity_invalid(self):
         """Test EXPIRE with negative quantity is invalid."""
-        lines = [
+        lines = (
             "STOCK Apple 5 2.00",
             "EXPIRE Apple -2",  # Invalid: negative quantity
             "CHECK",
             "PROFIT"
-        ]
+        )
         
-        expected_output = "Profit/Loss: NA"
-        result = run_sim(lines)
+        expected_output = NA
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_10_over_return_invalid(self):
         """Test RETURN more than sold at price is invalid."""
-        lines = [
+        lines = (
             "STOCK Apple 5 2.00",
             "ORDER Apple 3 4.00",
             "RETURN Apple 5 4.00",  # Invalid: only sold 3 at $4.00
             "CHECK",
             "PROFIT"
-        ]
+        )
         
-        expected_output = "Profit/Loss: NA"
-        result = run_sim(lines)
+        expected_output = NA
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_11_return_wrong_price_invalid(self):
         """Test RETURN at price never sold is invalid."""
-        lines = [
+        lines = (
             "STOCK Apple 5 2.00",
             "ORDER Apple 3 4.00",
             "RETURN Apple 2 5.00",  # Invalid: never sold at $5.00
             "CHECK",
             "PROFIT"
-        ]
+        )
         
-        expected_output = "Profit/Loss: NA"
-        result = run_sim(lines)
+        expected_output = NA
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_12_negative_return_quantity_invalid(self):
         """Test RETURN with negative quantity is invalid."""
-        lines = [
+        lines = (
             "STOCK Apple 5 2.00",
             "ORDER Apple 3 4.00",
             "RETURN Apple -1 4.00",  # Invalid: negative quantity
             "CHECK",
             "PROFIT"
-        ]
+        )
         
-        expected_output = "Profit/Loss: NA"
-        result = run_sim(lines)
+        expected_output = NA
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_13_zero_quantities_valid_noop(self):
         """Test zero quantity operations are valid no-ops."""
-        lines = [
+        lines = (
             "STOCK Apple 10 2.00",
             "ORDER Apple 0 4.00",   # Valid no-op
             "EXPIRE Apple 0",       # Valid no-op
             "RETURN Apple 0 4.00",  # Valid no-op
             "CHECK",
             "PROFIT"
-        ]
+        )
         
         expected_output = """Apple: 10
 Profit/Loss: $0.00"""
         
-        result = run_sim(lines)
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_14_item_sorting_alphabetical(self):
         """Test CHECK output is sorted alphabetically."""
-        lines = [
+        lines = (
             "STOCK Zebra 5 1.00",
             "STOCK Apple 10 2.00", 
             "STOCK Banana 3 1.50",
             "STOCK Orange 7 1.25",
             "CHECK",
             "PROFIT"
-        ]
+        )
         
         expected_output = """Apple: 10
 Banana: 3
@@ -235,29 +264,29 @@ Orange: 7
 Zebra: 5
 Profit/Loss: $0.00"""
         
-        result = run_sim(lines)
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_15_discount_stack_lifo(self):
         """Test discount stack is LIFO - last one wins."""
-        lines = [
+        lines = (
             "STOCK Apple 10 1.00",
             "DISCOUNT Apple 10",     # 10% discount
             "DISCOUNT Apple 20",     # 20% discount (overwrites 10%)
             "ORDER Apple 1 4.00",    # Should use 20% -> sell at $3.20
             "CHECK",
             "PROFIT"
-        ]
+        )
         
         expected_output = """Apple: 9
 Profit/Loss: $2.20"""  # (3.20 - 1.00) = 2.20
         
-        result = run_sim(lines)
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_16_discount_end_pop(self):
         """Test DISCOUNT_END pops most recent discount."""
-        lines = [
+        lines = (
             "STOCK Apple 10 1.00",
             "DISCOUNT Apple 10",     # 10% discount
             "DISCOUNT Apple 20",     # 20% discount
@@ -265,33 +294,33 @@ Profit/Loss: $2.20"""  # (3.20 - 1.00) = 2.20
             "ORDER Apple 1 4.00",    # Should use 10% -> sell at $3.60
             "CHECK",
             "PROFIT"
-        ]
+        )
         
         expected_output = """Apple: 9
 Profit/Loss: $2.60"""  # (3.60 - 1.00) = 2.60
         
-        result = run_sim(lines)
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_17_discount_end_empty_noop(self):
         """Test DISCOUNT_END on empty stack is no-op."""
-        lines = [
+        lines = (
             "STOCK Apple 10 1.00",
             "DISCOUNT_END Apple",    # No-op: no discounts to remove
             "ORDER Apple 1 4.00",    # No discount -> sell at $4.00
             "CHECK",
             "PROFIT"
-        ]
+        )
         
         expected_output = """Apple: 9
 Profit/Loss: $3.00"""  # (4.00 - 1.00) = 3.00
         
-        result = run_sim(lines)
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_18_multiple_discount_end_noop(self):
         """Test multiple DISCOUNT_END calls are safe no-ops."""
-        lines = [
+        lines = (
             "STOCK Apple 10 1.00",
             "DISCOUNT Apple 15",
             "DISCOUNT_END Apple",    # Remove 15%
@@ -300,52 +329,52 @@ Profit/Loss: $3.00"""  # (4.00 - 1.00) = 3.00
             "ORDER Apple 1 4.00",    # No discount
             "CHECK",
             "PROFIT"
-        ]
+        )
         
         expected_output = """Apple: 9
 Profit/Loss: $3.00"""
         
-        result = run_sim(lines)
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_19_fifo_multiple_batches(self):
         """Test FIFO consumption across multiple batches."""
-        lines = [
+        lines = (
             "STOCK Apple 3 1.00",   # Batch 1: 3 @ $1.00
             "STOCK Apple 2 2.00",   # Batch 2: 2 @ $2.00  
             "STOCK Apple 4 1.50",   # Batch 3: 4 @ $1.50
             "ORDER Apple 6 5.00",   # Uses all of Batch 1, all of Batch 2, 1 from Batch 3
             "CHECK",
             "PROFIT"
-        ]
+        )
         
         # Profit: 3*(5-1) + 2*(5-2) + 1*(5-1.5) = 12 + 6 + 3.5 = 21.5
         expected_output = """Apple: 3
 Profit/Loss: $21.50"""
         
-        result = run_sim(lines)
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_20_expire_fifo_consumption(self):
         """Test EXPIRE uses FIFO consumption."""
-        lines = [
+        lines = (
             "STOCK Apple 3 1.00",   # Batch 1: 3 @ $1.00
             "STOCK Apple 2 3.00",   # Batch 2: 2 @ $3.00
             "EXPIRE Apple 4",       # Expire 3 from Batch 1 + 1 from Batch 2
             "CHECK",
             "PROFIT"
-        ]
+        )
         
         # Loss: -(3*1.00 + 1*3.00) = -6.00
         expected_output = """Apple: 1
 Profit/Loss: $-6.00"""
         
-        result = run_sim(lines)
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_21_mixed_operations_complex(self):
         """Test complex scenario with mixed operations."""
-        lines = [
+        lines = (
             "STOCK Apple 10 2.00",
             "STOCK Banana 5 1.50",
             "DISCOUNT Apple 25",     # 25% discount on Apple
@@ -355,7 +384,7 @@ Profit/Loss: $-6.00"""
             "RETURN Apple 1 8.00",   # Return 1 apple
             "CHECK",
             "PROFIT"
-        ]
+        )
         
         # Apple profit: 3*(6.00-2.00) - 1*(6.00-2.00) = 12 - 4 = 8
         # Banana profit: 2*(4.00-1.50) = 5
@@ -365,48 +394,48 @@ Profit/Loss: $-6.00"""
 Banana: 3
 Profit/Loss: $9.00"""
         
-        result = run_sim(lines)
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_22_return_exact_price_match(self):
         """Test returns must match exact sell price."""
-        lines = [
+        lines = (
             "STOCK Apple 5 1.00",
             "ORDER Apple 2 3.00",   # Sell 2 at $3.00
             "ORDER Apple 1 4.00",   # Sell 1 at $4.00
             "RETURN Apple 1 3.00",  # Return 1 at $3.00 (valid)
             "CHECK",
             "PROFIT"
-        ]
+        )
         
         # Profit: 2*(3-1) + 1*(4-1) - 1*(3-1) = 4 + 3 - 2 = 5
         expected_output = """Apple: 2
 Profit/Loss: $5.00"""
         
-        result = run_sim(lines)
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_23_return_lifo_by_sale_lot(self):
         """Test returns are LIFO by sale lot at same price."""
-        lines = [
+        lines = (
             "STOCK Apple 10 1.00",
             "ORDER Apple 2 5.00",   # Sale lot 1
             "ORDER Apple 3 5.00",   # Sale lot 2 (more recent)
             "RETURN Apple 1 5.00",  # Should return from lot 2 (LIFO)
             "CHECK",
             "PROFIT"
-        ]
+        )
         
         # Profit: 2*(5-1) + 3*(5-1) - 1*(5-1) = 8 + 12 - 4 = 16
         expected_output = """Apple: 5
 Profit/Loss: $16.00"""
         
-        result = run_sim(lines)
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_24_discount_per_item_independent(self):
         """Test discounts are independent per item."""
-        lines = [
+        lines = (
             "STOCK Apple 5 1.00",
             "STOCK Banana 5 1.00", 
             "DISCOUNT Apple 20",    # Only affects Apple
@@ -414,7 +443,7 @@ Profit/Loss: $16.00"""
             "ORDER Banana 1 5.00",  # No discount -> $5.00
             "CHECK",
             "PROFIT"
-        ]
+        )
         
         # Apple: 1*(4.00-1.00) = 3.00
         # Banana: 1*(5.00-1.00) = 4.00
@@ -422,57 +451,57 @@ Profit/Loss: $16.00"""
 Banana: 4
 Profit/Loss: $7.00"""
         
-        result = run_sim(lines)
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_25_money_formatting_precision(self):
         """Test money formatting with various decimal cases."""
-        lines = [
+        lines = (
             "STOCK Apple 1 1.00",
             "ORDER Apple 1 1.333",  # Should round to $0.33 profit
             "CHECK",
             "PROFIT"
-        ]
+        )
         
         expected_output = """Apple: 0
 Profit/Loss: $0.33"""
         
-        result = run_sim(lines)
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_26_negative_profit_formatting(self):
         """Test negative profit formatting."""
-        lines = [
+        lines = (
             "STOCK Apple 1 5.00",
             "ORDER Apple 1 2.00",   # Loss: 2.00 - 5.00 = -3.00
             "CHECK",
             "PROFIT"
-        ]
+        )
         
         expected_output = """Apple: 0
 Profit/Loss: $-3.00"""
         
-        result = run_sim(lines)
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_27_floating_point_quantities(self):
         """Test handling of floating point quantity inputs."""
-        lines = [
+        lines = (
             "STOCK Apple 10.0 2.50",  # Should parse as int(10)
             "ORDER Apple 3.0 4.00",   # Should parse as int(3)
             "CHECK",
             "PROFIT"
-        ]
+        )
         
         expected_output = """Apple: 7
 Profit/Loss: $4.50"""  # 3*(4.00-2.50) = 4.50
         
-        result = run_sim(lines)
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_28_empty_lines_and_comments(self):
         """Test handling of empty lines and comments."""
-        lines = [
+        lines = (
             "STOCK Apple 5 2.00",
             "",                     # Empty line - should be ignored
             "# This is a comment",  # Comment - should be ignored
@@ -480,95 +509,95 @@ Profit/Loss: $4.50"""  # 3*(4.00-2.50) = 4.50
             "",
             "CHECK",
             "PROFIT"
-        ]
+        )
         
         expected_output = """Apple: 3
 Profit/Loss: $2.00"""
         
-        result = run_sim(lines)
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_29_large_numbers(self):
         """Test handling of large numbers."""
-        lines = [
+        lines = (
             "STOCK Apple 1000 0.50",
             "ORDER Apple 500 2.00",
             "CHECK",
             "PROFIT"
-        ]
+        )
         
         expected_output = """Apple: 500
 Profit/Loss: $750.00"""  # 500*(2.00-0.50) = 750.00
         
-        result = run_sim(lines)
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_30_check_suppression_verification(self):
         """Test CHECK is completely suppressed when invalid."""
-        lines = [
+        lines = (
             "STOCK Apple 5 2.00",
             "STOCK Banana 3 1.00",
             "ORDER Apple 10 4.00",  # Invalid: oversell
             "CHECK"                 # Should produce no output
-        ]
+        )
         
         expected_output = ""  # Completely empty
-        result = run_sim(lines)
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_31_profit_na_after_invalid(self):
         """Test PROFIT shows NA after any invalid operation."""
-        lines = [
+        lines = (
             "STOCK Apple 10 2.00",
             "ORDER Apple 5 3.00",   # Valid operation first
             "EXPIRE Apple 20",      # Invalid: over-expire
             "PROFIT"
-        ]
+        )
         
-        expected_output = "Profit/Loss: NA"
-        result = run_sim(lines)
+        expected_output = NA
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_32_invalid_command_syntax(self):
         """Test invalid command syntax triggers invalid state."""
-        lines = [
+        lines = (
             "STOCK Apple 5 2.00",
             "INVALID_COMMAND",      # Unknown command
             "CHECK",
             "PROFIT"
-        ]
+        )
         
-        expected_output = "Profit/Loss: NA"
-        result = run_sim(lines)
+        expected_output = NA
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_33_malformed_parameters(self):
         """Test malformed parameters trigger invalid state."""
-        lines = [
+        lines = (
             "STOCK Apple",          # Missing parameters
             "CHECK",
             "PROFIT"
-        ]
+        )
         
-        expected_output = "Profit/Loss: NA"
-        result = run_sim(lines)
+        expected_output = NA
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_34_non_numeric_parameters(self):
         """Test non-numeric parameters trigger invalid state."""
-        lines = [
+        lines = (
             "STOCK Apple abc 2.00", # Non-numeric quantity
             "CHECK",
             "PROFIT"
-        ]
+        )
         
-        expected_output = "Profit/Loss: NA"
-        result = run_sim(lines)
+        expected_output = NA
+        result = run_sim(lines, self.shared)
         self.assertEqual(result, expected_output)
     
     def test_35_comprehensive_workflow(self):
         """Test comprehensive workflow with all command types."""
-        lines = [
+        lines = (
             "STOCK Apple 20 1.50",
             "STOCK Banana 15 2.00",
             "STOCK Apple 10 1.75",   # Second batch
@@ -584,14 +613,233 @@ Profit/Loss: $750.00"""  # 500*(2.00-0.50) = 750.00
             "ORDER Apple 3 4.00",
             "CHECK",
             "PROFIT"
-        ]
+        )
         
         # Complex calculation - verify implementation handles it correctly
-        result = run_sim(lines)
-        self.assertIn("Apple:", result)
-        self.assertIn("Banana:", result)
-        self.assertIn("Profit/Loss: $", result)
-        self.assertNotIn("NA", result)  # Should be valid
+        result = run_sim(lines, self.shared)
+        # One pass over the output, then set lookups for the CHECK entries
+        lines_out = result.splitlines()
+        prefixes = {ln.split(":", 1)[0] for ln in lines_out}
+        self.assertIn("Apple", prefixes)
+        self.assertIn("Banana", prefixes)
+        self.assertTrue(any(ln.startswith(self.PROFIT_PREFIX) for ln in lines_out))
+        self.assertFalse(any("NA" in ln for ln in lines_out))  # Should be valid
+    
+    def test_36_quantities_beyond_64_bits(self):
+        """Test quantities too large for a machine integer stay valid and exact."""
+        lines = (
+            "STOCK Apple 99999999999999999999 1.00",
+            "ORDER Apple 99999999999999999998 2.00",
+            "RETURN Apple 1 2.00",
+            "CHECK",
+            "PROFIT"
+        )
+        
+        expected_output = """Apple: 1
+Profit/Loss: $99999999999999999997.00"""
+        
+        result = run_sim(lines, self.shared)
+        self.assertEqual(result, expected_output)
+    
+    def test_37_fractional_cent_discount(self):
+        """Test discounted prices keep their fractions of a cent across many units."""
+        lines = (
+            "STOCK Apple 100 1.00",
+            "STOCK Banana 100 1.00",
+            "DISCOUNT Apple 15",
+            "DISCOUNT Banana 33",
+            "ORDER Apple 100 2.99",   # 100*(2.5415-1.00) = 154.15
+            "PROFIT",
+            "RETURN Apple 40 2.99",   # -40*1.5415 = -61.66
+            "PROFIT",
+            "ORDER Banana 100 1.50",  # 100*(1.005-1.00) = 0.50
+            "PROFIT"
+        )
+        
+        expected_output = """Profit/Loss: $154.15
+Profit/Loss: $92.49
+Profit/Loss: $92.99"""
+        
+        result = run_sim(lines, self.shared)
+        self.assertEqual(result, expected_output)
+    
+    def test_38_stock_cost_below_one_cent_invalid(self):
+        """Test a cost that rounds to zero cents fails the cost>0 rule."""
+        lines = (
+            "STOCK Apple 5 0.004",
+            "CHECK",
+            "PROFIT"
+        )
+        
+        expected_output = NA
+        result = run_sim(lines, self.shared)
+        self.assertEqual(result, expected_output)
+    
+    def test_39_many_batches_with_return(self):
+        """Test ORDER/EXPIRE spanning many batches, past compaction, then RETURN."""
+        # 40 batches of 2 units costing $1.00, $1.01, ... $1.39
+        lines = tuple(f"STOCK Apple 2 {1 + i / 100:.2f}" for i in range(40)) + (
+            "EXPIRE Apple 7",        # 2*1.00 + 2*1.01 + 2*1.02 + 1.03 = 7.09
+            "ORDER Apple 61 5.00",   # 305.00 - (1.03 + batches 4..33 = 71.10) = 232.87
+            "DISCOUNT Apple 10",
+            "ORDER Apple 3 5.00",    # 13.50 - (2*1.34 + 1.35) = 9.47
+            "CHECK",
+            "PROFIT",
+            "RETURN Apple 10 5.00",  # -9.47 (last sale) - 27.67 (7 oldest of the first)
+            "EXPIRE Apple 5",        # 1.35 + 2*1.36 + 2*1.37 = 6.81
+            "CHECK",
+            "PROFIT"
+        )
+        
+        expected_output = """Apple: 9
+Profit/Loss: $235.25
+Apple: 4
+Profit/Loss: $191.30"""
+        
+        result = run_sim(lines, self.shared)
+        self.assertEqual(result, expected_output)
+    
+    def test_40_non_finite_numbers_invalid(self):
+        """Test inf/nan money values make the run invalid instead of printing $inf/$nan."""
+        cases = (
+            ("STOCK Apple 5 nan",),
+            ("STOCK Apple 5 inf",),
+            ("STOCK Apple 5 1.00", "ORDER Apple 1 inf"),
+            ("STOCK Apple 5 1.00", "ORDER Apple 0 nan"),
+            ("STOCK Apple 5 1.00", "DISCOUNT Apple inf", "ORDER Apple 1 2.00"),
+        )
+        for lines in cases:
+            with self.subTest(lines=lines):
+                # A fresh simulator per case, as the shared one is reset per test
+                result = run_sim(lines + ("PROFIT",))
+                self.assertEqual(result, NA)
+    
+    def test_41_sink_receives_one_line_per_call(self):
+        """Test a CHECK listing reaches the out sink one line at a time."""
+        lines = (
+            "STOCK Banana 2 1.00",
+            "STOCK Apple 4 0.50",
+            "CHECK",
+            "PROFIT"
+        )
+        
+        run_sim(lines, self.shared)
+        self.assertEqual(self._shared_buf, ["Apple: 4", "Banana: 2", "Profit/Loss: $0.00"])
+    
+    def test_42_half_cent_rounds_away_from_zero(self):
+        """Test an exact half-cent profit rounds away from zero for gains and losses."""
+        cases = (
+            # 1.675 - 1.00 = 0.675
+            (("STOCK A 1 1.00", "DISCOUNT A 33", "ORDER A 1 2.50"), "Profit/Loss: $0.68"),
+            # 0.945 - 1.00 = -0.055
+            (("STOCK A 1 1.00", "DISCOUNT A 10", "ORDER A 1 1.05"), "Profit/Loss: $-0.06"),
+        )
+        for lines, expected_output in cases:
+            with self.subTest(lines=lines):
+                result = run_sim(lines + ("PROFIT",))
+                self.assertEqual(result, expected_output)
+
+
+class TestRunFile(unittest.TestCase):
+    """Tests for GrocerySimulator.run_file reading command files from disk."""
+    
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.buf = []
+        self.sim = GrocerySimulator(out=self.buf.append)
+    
+    def write_input(self, text, name="input.txt"):
+        """Write text to a file in the test's temp directory and return its path."""
+        path = os.path.join(self._tmp.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+    
+    def test_returns_tracked_after_file_without_return(self):
+        """Test a file with no RETURN does not stop later lines from returning sales."""
+        path = self.write_input("STOCK Apple 5 1.00\nORDER Apple 2 3.00\nPROFIT\n")
+        self.sim.run_file(path)
+        self.sim.process_lines((
+            "STOCK X 5 1",
+            "ORDER X 2 3",
+            "RETURN X 1 3",
+            "PROFIT"
+        ))
+        
+        self.assertEqual(self.buf, ["Profit/Loss: $4.00", "Profit/Loss: $6.00"])
+    
+    def test_file_without_return(self):
+        """Test a file with no RETURN, so sales are not recorded for reversal."""
+        path = self.write_input(
+            "STOCK Apple 3 1.00\n"
+            "STOCK Apple 3 2.00\n"
+            "DISCOUNT Apple 50\n"
+            "ORDER Apple 5 6.00\n"   # 3*(3.00-1.00) + 2*(3.00-2.00) = 8.00
+            "CHECK\n"
+            "PROFIT\n"
+        )
+        self.sim.run_file(path)
+        
+        self.assertEqual(self.buf, ["Apple: 1", "Profit/Loss: $8.00"])
+        self.assertEqual(self.sim.sales, {})
+    
+    def test_invalid_line_then_check_and_profits(self):
+        """Test only well-formed PROFIT lines print (as NA) after an invalid line."""
+        path = self.write_input(
+            "STOCK Apple 5 1.00\n"
+            "CHECK\n"
+            "ORDER Apple 10 2.00\n"  # Oversell => invalid
+            "CHECK\n"
+            "PROFIT\n"
+            "STOCK Apple 5 1.00\n"
+            "# PROFIT\n"
+            "PROFIT extra\n"
+            "CHECK\n"
+            "  PROFIT\n"
+        )
+        self.sim.run_file(path)
+        
+        self.assertEqual(self.buf, ["Apple: 5", NA, NA])
+        self.assertTrue(self.sim.invalid)
+    
+    def test_unreadable_path_invalid(self):
+        """Test a missing file or a directory marks the run invalid without output."""
+        for path in (os.path.join(self._tmp.name, "missing.txt"), self._tmp.name):
+            with self.subTest(path=path):
+                self.sim.run_file(path)
+                self.assertTrue(self.sim.invalid)
+                self.assertEqual(self.buf, [])
+    
+    def test_many_batches_without_return(self):
+        """Test untracked ORDER/EXPIRE spanning many batches, past compaction."""
+        # 40 batches of 2 units costing $1.00, $1.01, ... $1.39
+        path = self.write_input(
+            "".join(f"STOCK Apple 2 {1 + i / 100:.2f}\n" for i in range(40))
+            + "EXPIRE Apple 7\n"        # -7.09
+            + "ORDER Apple 61 5.00\n"   # +232.87, ends exactly on batch 33
+            + "DISCOUNT Apple 10\n"
+            + "ORDER Apple 3 5.00\n"    # +9.47
+            + "EXPIRE Apple 1\n"        # -1.35, exactly the rest of the head batch
+            + "CHECK\n"
+            + "PROFIT\n"
+        )
+        self.sim.run_file(path)
+        
+        self.assertEqual(self.buf, ["Apple: 8", "Profit/Loss: $233.90"])
+        # The 34 used-up batches were compacted out of the queue
+        self.assertEqual(len(self.sim.inventory["Apple"].qtys), 6)
+    
+    def test_default_sink_writes_exact_stdout(self):
+        """Test the default sink writes each output line with a single newline."""
+        path = self.write_input(
+            "STOCK Banana 2 1.00\nSTOCK Apple 4 0.50\nORDER Apple 1 2.00\nCHECK\nPROFIT\n"
+        )
+        captured = io.StringIO()
+        with contextlib.redirect_stdout(captured):
+            GrocerySimulator().run_file(path)
+        
+        self.assertEqual(captured.getvalue(), "Apple: 3\nBanana: 2\nProfit/Loss: $1.50\n")
 
 
 if __name__ == '__main__':